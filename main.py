@@ -1,18 +1,200 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import HTTPException
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from bson import ObjectId
 import pandas as pd
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # Backend sin GUI: el servidor no tiene pantalla
 import matplotlib.pyplot as plt
 import seaborn as sns
 import uvicorn
-from collections import defaultdict
-import boto3
+import aioboto3
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import orjson
 import os
-from datetime import datetime
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from cachetools import TTLCache
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="SmartStock Analytics API", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+# Configuración MongoDB
+MONGO_URI = "mongodb://localhost:27017/"
+MONGO_DB = "smartstock_analytics"
+BUCKET_NAME = 'proy-cloud-bucket'  # Tu bucket
+CARPETA_DESTINO = 'Analisis/graficas/'  # Carpeta correcta que pediste
+# upload_fileobj de aioboto3 envía con un solo put_object todo lo que quepa en un
+# bloque de multipart_chunksize; las gráficas pesan unos KB, así que nunca hay multipart
+S3_TRANSFER_CONFIG = TransferConfig(multipart_chunksize=50 * 1024 * 1024)
+
+# Ruta al CSV local
+CSV_LOCAL_PATH = "./movimiento_inventario.csv"
+CSV_CHUNKSIZE = 500_000  # Filas por bloque al leer el CSV
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+MESES = ("enero", "febrero", "marzo", "abril", "mayo", "junio",
+         "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+
+# Proyecciones: solo se traen los campos que usan los endpoints
+PROYECCION_VENTAS = {"_id": 0, "nombre_producto": 1, "producto_id": 1, "total_ventas": 1}
+
+# El histograma de estados se calcula en MongoDB: a lo sumo 3 documentos de respuesta
+PIPELINE_ALERTAS = [{"$group": {"_id": "$estado", "count": {"$sum": 1}}}]
+
+
+def pipeline_estacionalidad(n):
+    # Devuelve los datasets ya con la forma del frontend: {"label", "data"}
+    return [
+        {"$limit": n},
+        {"$project": {
+            "_id": 0,
+            "label": {"$ifNull": ["$nombre_producto",
+                                  {"$concat": ["Producto ", {"$toString": "$producto_id"}]}]},
+            "data": "$ventas_por_mes",
+        }},
+    ]
+
+
+# Caché de respuestas ya serializadas; los datos solo cambian en /sync, que la vacía.
+# /sync también incrementa la generación: una lectura que empezó antes de una
+# sincronización no guarda su respuesta, para no dejar datos viejos en la caché.
+_cache = TTLCache(maxsize=128, ttl=300)
+_generacion_cache = 0
+
+
+async def respuesta_cacheada(clave, construir):
+    # Una sola consulta a la caché: con "in" + [] la entrada podría expirar entre ambas
+    body = _cache.get(clave)
+    if body is None:
+        generacion = _generacion_cache
+        body = orjson.dumps(await construir())
+        if generacion == _generacion_cache:
+            _cache[clave] = body
+    return respuesta_json(body)
+
+
+def invalidar_cache():
+    global _generacion_cache
+    _generacion_cache += 1
+    _cache.clear()
+
+
+def respuesta_json(body):
+    return Response(body, media_type="application/json")
+
+
+# Último hash subido por gráfica: si no cambia, ni siquiera se consulta S3
+_hash_subido = {}
+
+
+async def existe_en_s3(s3, key):
+    try:
+        await s3.head_object(Bucket=BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    return True
+
+
+async def crear_indices(db):
+    # Devuelve True si quedaron todos los índices; los fallos se registran y no se propagan
+    resultados = await asyncio.gather(
+        db.ventas_aggregadas.create_index([("total_ventas", -1)]),
+        db.alertas_stock.create_index([("estado", 1)]),
+        *(db[nombre].create_index([("producto_id", 1)], unique=True)
+          for nombre in ("ventas_aggregadas", "alertas_stock", "estacionalidad")),
+        *(db[nombre].create_index([("id_sincronizacion", 1)])
+          for nombre in ("ventas_aggregadas", "alertas_stock", "estacionalidad")),
+        return_exceptions=True,
+    )
+    errores = [r for r in resultados if isinstance(r, Exception)]
+    for error in errores:
+        logger.warning("No se pudo crear un índice en MongoDB: %s", error)
+    return not errores
+
+
+async def asegurar_indices(app):
+    if not app.state.indices_creados:
+        app.state.indices_creados = await crear_indices(app.state.db)
+
+
+async def actualizar_coleccion(coleccion, docs, id_sincronizacion):
+    # Upsert por producto_id marcando cada documento con esta sincronización
+    if docs:
+        await coleccion.bulk_write([
+            UpdateOne({"producto_id": doc["producto_id"]},
+                      {"$set": {**doc, "id_sincronizacion": id_sincronizacion}},
+                      upsert=True)
+            for doc in docs
+        ], ordered=False)
+    # bulk_write lanza BulkWriteError si algún upsert falló, así que solo se llega aquí
+    # sin errores de escritura: lo que no lleva la marca ya no está en el CSV
+    await coleccion.delete_many({"id_sincronizacion": {"$ne": id_sincronizacion}})
+
+
+async def leer_top_ventas(db, limit):
+    # Una sola pasada sobre el cursor
+    labels = []
+    values = []
+    cursor = db.ventas_aggregadas.find({}, PROYECCION_VENTAS).sort("total_ventas", -1).limit(limit)
+    async for venta in cursor:
+        labels.append(venta.get("nombre_producto", f"Producto {venta['producto_id']}"))
+        values.append(venta["total_ventas"])
+    return labels, values
+
+
+async def leer_estacionalidad(db, n):
+    # El $project ya deja cada documento con la forma {"label", "data"}
+    return await db.estacionalidad.aggregate(pipeline_estacionalidad(n)).to_list(length=n)
+
+
+async def contar_alertas(db):
+    conteo = {"CRÍTICO": 0, "BAJO": 0, "NORMAL": 0}
+    async for grupo in db.alertas_stock.aggregate(PIPELINE_ALERTAS):
+        conteo[grupo["_id"] or "NORMAL"] += grupo["count"]
+    return conteo
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Los clientes se crean una sola vez al arrancar y se cierran al apagar
+    client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=50, minPoolSize=5)
+    app.state.db = client[MONGO_DB]
+    # Un proceso por gráfica; "spawn" evita heredar los hilos del cliente de MongoDB
+    app.state.pool = ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context("spawn"))
+    # Serializa /sync: dos sincronizaciones solapadas borrarían los documentos de la otra
+    app.state.sync_lock = asyncio.Lock()
+    # Los índices se crean en segundo plano: si MongoDB aún no está listo el arranque
+    # no espera ni falla, y /sync vuelve a intentarlo
+    app.state.indices_creados = False
+    tarea_indices = asyncio.create_task(asegurar_indices(app))
+    try:
+        async with aioboto3.Session().client('s3') as s3:
+            app.state.s3 = s3
+            yield
+    finally:
+        tarea_indices.cancel()
+        app.state.pool.shutdown()
+        client.close()
+
+
+app = FastAPI(
+    title="SmartStock Analytics API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # CORS
 app.add_middleware(
@@ -23,142 +205,111 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configuración MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["smartstock_analytics"]
-s3_client = boto3.client('s3')
-BUCKET_NAME = 'proy-cloud-bucket'  # Tu bucket
-CARPETA_DESTINO = 'Analisis/graficas/'  # Carpeta correcta que pediste
-
-# Ruta al CSV local
-CSV_LOCAL_PATH = "./movimiento_inventario.csv"
-
 
 # ========= ENDPOINTS ==========
 @app.get("/ventas/top", summary="Obtener datos de productos más vendidos")
-def get_top_ventas(limit: int = 10):
-    ventas = list(db.ventas_aggregadas.find().sort("total_ventas", -1).limit(limit))
-    labels = [venta.get("nombre_producto", f"Producto {venta['producto_id']}") for venta in ventas]
-    values = [venta["total_ventas"] for venta in ventas]
-    return JSONResponse(content={"labels": labels, "values": values})
+async def get_top_ventas(request: Request, limit: int = 10):
+    async def construir():
+        labels, values = await leer_top_ventas(request.app.state.db, limit)
+        return {"labels": labels, "values": values}
+
+    return await respuesta_cacheada(("top", limit), construir)
 
 
 @app.get("/stock/alertas", summary="Obtener distribución de alertas de stock")
-def get_alertas_stock():
-    alertas = list(db.alertas_stock.find())
-    conteo = {"CRÍTICO": 0, "BAJO": 0, "NORMAL": 0}
-    for alerta in alertas:
-        estado = alerta.get("estado", "NORMAL")
-        conteo[estado] += 1
-    labels = list(conteo.keys())
-    values = list(conteo.values())
-    return JSONResponse(content={"labels": labels, "values": values})
+async def get_alertas_stock(request: Request):
+    async def construir():
+        conteo = await contar_alertas(request.app.state.db)
+        return {"labels": list(conteo.keys()), "values": list(conteo.values())}
 
+    return await respuesta_cacheada(("alertas",), construir)
 
-@app.get("/ventas/estacionalidad", summary="Obtener estacionalidad de ventas")
-def get_ventas_estacionalidad():
-    estacionalidad = list(db.estacionalidad.find())
-    labels = ["enero", "febrero", "marzo", "abril", "mayo", "junio",
-              "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
 
-    datasets = []
-    for dato in estacionalidad[:5]:  # Mostramos solo 5 productos
-        datasets.append({
-            "label": dato.get("nombre_producto", f"Producto {dato['producto_id']}"),
-            "data": [dato["ventas_por_mes"].get(mes, 0) for mes in labels]
-        })
+@app.get("/ventas/estacionalidad", summary="Obtener estacionalidad de ventas")
+async def get_ventas_estacionalidad(request: Request):
+    async def construir():
+        # Mostramos solo 5 productos
+        datasets = await leer_estacionalidad(request.app.state.db, 5)
+        return {"labels": MESES, "datasets": datasets}
 
-    return JSONResponse(content={"labels": labels, "datasets": datasets})
+    return await respuesta_cacheada(("estacionalidad",), construir)
 
 
 @app.post("/sync", summary="Sincronizar datos desde CSV local")
-def sync_local_csv():
+async def sync_local_csv(request: Request):
+    db = request.app.state.db
     try:
-        df = pd.read_csv(CSV_LOCAL_PATH)
-
-        ventas_totales = defaultdict(int)
-        ventas_por_mes = defaultdict(lambda: defaultdict(int))
-        stock_actual = defaultdict(int)
-
-        for _, row in df.iterrows():
-            producto_id = row['producto_id']
-            nombre_producto = row.get('nombre_producto', f"Producto {producto_id}")
-            tipo = row['tipo']
-            cantidad = row['cantidad']
-            fecha = row['fecha']
-
-            if tipo == 'entrada':
-                stock_actual[producto_id] += cantidad
-            elif tipo == 'salida':
-                stock_actual[producto_id] -= cantidad
-                ventas_totales[producto_id] += cantidad
-                if isinstance(fecha, str):
-                    fecha = datetime.strptime(fecha, "%Y-%m-%d %H:%M:%S")
-                mes = fecha.strftime("%B").lower()
-                ventas_por_mes[producto_id][mes] += cantidad
-
-        # Limpiar colecciones
-        db.ventas_aggregadas.delete_many({})
-        db.alertas_stock.delete_many({})
-        db.estacionalidad.delete_many({})
-
-        # Insertar datos nuevos
-        for producto_id, total in ventas_totales.items():
-            db.ventas_aggregadas.insert_one({
-                "producto_id": int(producto_id),
-                "nombre_producto": f"Producto {producto_id}",  # Asignamos un nombre base
-                "total_ventas": int(total)
-            })
-
-        for producto_id, stock in stock_actual.items():
-            estado = "CRÍTICO" if stock < 10 else "BAJO" if stock < 50 else "NORMAL"
-            db.alertas_stock.insert_one({
-                "producto_id": int(producto_id),
-                "nombre_producto": f"Producto {producto_id}",
-                "stock_actual": int(stock),
-                "estado": estado
-            })
-
-        for producto_id, ventas_mes in ventas_por_mes.items():
-            db.estacionalidad.insert_one({
-                "producto_id": int(producto_id),
-                "nombre_producto": f"Producto {producto_id}",
-                "ventas_por_mes": dict(ventas_mes)
-            })
-
-        return JSONResponse(content={"message": "Sincronización local completada exitosamente."})
+        async with request.app.state.sync_lock:
+            # La agregación con pandas es CPU: se ejecuta fuera del event loop
+            ventas_docs, stock_docs, estacionalidad_docs = await asyncio.to_thread(agregar_csv_local)
+
+            # Actualizar colecciones: un bulk_write por colección, los tres en paralelo
+            id_sincronizacion = ObjectId()
+            await asyncio.gather(
+                actualizar_coleccion(db.ventas_aggregadas, ventas_docs, id_sincronizacion),
+                actualizar_coleccion(db.alertas_stock, stock_docs, id_sincronizacion),
+                actualizar_coleccion(db.estacionalidad, estacionalidad_docs, id_sincronizacion),
+            )
+            # Después de escribir: la sincronización ya eliminó los producto_id duplicados
+            # que impedían crear el índice único
+            await asegurar_indices(request.app)
+
+        return {"message": "Sincronización local completada exitosamente."}
 
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
+    finally:
+        # También si falla: alguno de los bulk_write pudo haberse aplicado
+        invalidar_cache()
 
 
-@app.post("/graficas", summary="Generar gráficas y subirlas a S3")
-def generar_y_subir_graficas():
-    # 1. Generar las gráficas localmente
-    graficar_top_ventas()
-    graficar_alertas_stock()
-    graficar_estacionalidad()
 
-    # 2. Subir los PNG generados
+@app.post("/graficas", summary="Generar gráficas y subirlas a S3")
+async def generar_y_subir_graficas(request: Request):
+    db = request.app.state.db
+    s3 = request.app.state.s3
+    pool = request.app.state.pool
+
+    # 1. Leer los datos y generar las gráficas en paralelo (matplotlib es CPU y no libera el GIL)
+    (productos, cantidades), conteo, estacionalidad = await asyncio.gather(
+        leer_top_ventas(db, 10),
+        contar_alertas(db),
+        leer_estacionalidad(db, 3),
+    )
+    loop = asyncio.get_running_loop()
+    pngs = await asyncio.gather(
+        loop.run_in_executor(pool, graficar_top_ventas, productos, cantidades),
+        loop.run_in_executor(pool, graficar_alertas_stock, conteo),
+        loop.run_in_executor(pool, graficar_estacionalidad, estacionalidad),
+    )
+
+    # 2. Subir los PNG generados en paralelo. La clave incluye el hash del contenido,
+    # así que una gráfica idéntica a una ya subida no se vuelve a subir.
     archivos = ["top_ventas.png", "alertas_stock.png", "estacionalidad_ventas.png"]
-    urls_subidas = []
-
-    for archivo in archivos:
-        try:
-            nombre_s3 = f"{CARPETA_DESTINO}{datetime.now().strftime('%Y%m%d_%H%M%S')}_{archivo}"
-            s3_client.upload_file(
-                Filename=archivo,
-                Bucket=BUCKET_NAME,
-                Key=nombre_s3,
-                ExtraArgs={'ContentType': 'image/png', 'ACL': 'public-read'}
+
+    async def _upload(archivo, png):
+        h = hashlib.blake2b(png, digest_size=8).hexdigest()
+        nombre_s3 = f"{CARPETA_DESTINO}{h}_{archivo}"
+        if _hash_subido.get(archivo) != h and not await existe_en_s3(s3, nombre_s3):
+            await s3.upload_fileobj(
+                io.BytesIO(png),
+                BUCKET_NAME,
+                nombre_s3,
+                ExtraArgs={'ContentType': 'image/png', 'ACL': 'public-read'},
+                Config=S3_TRANSFER_CONFIG
             )
-            url = f"https://{BUCKET_NAME}.s3.amazonaws.com/{nombre_s3}"
-            urls_subidas.append(url)
-        except Exception as e:
-            return {"error": f"Error subiendo {archivo}: {str(e)}"}
+        _hash_subido[archivo] = h
+        return f"https://{BUCKET_NAME}.s3.amazonaws.com/{nombre_s3}"
+
+    resultados = await asyncio.gather(*[_upload(a, png) for a, png in zip(archivos, pngs)], return_exceptions=True)
+
+    for archivo, resultado in zip(archivos, resultados):
+        if isinstance(resultado, Exception):
+            return {"error": f"Error subiendo {archivo}: {str(resultado)}"}
+
+    return {"graficas_subidas": resultados}
 
-    return {"graficas_subidas": urls_subidas}
 
 
 
@@ -168,57 +319,128 @@ def generar_y_subir_graficas():
 
 
 
+# ========= FUNCIONES DE AGREGACIÓN ==========
+def agregar_csv_local():
+    # El CSV se procesa por bloques: las tres sumas son asociativas, así que basta con
+    # agregar cada bloque y luego sumar los parciales (memoria acotada por bloque)
+    parciales_stock, parciales_ventas, parciales_mes = [], [], []
+    lector = pd.read_csv(
+        CSV_LOCAL_PATH,
+        dtype={"producto_id": "int32", "cantidad": "int32", "tipo": "category"},
+        chunksize=CSV_CHUNKSIZE,
+    )
+    for df in lector:
+        tipo = df['tipo'].values
+        cantidad = df['cantidad'].values.astype('int64')
+        df['signed'] = np.where(tipo == 'entrada', cantidad, np.where(tipo == 'salida', -cantidad, 0))
+        parciales_stock.append(df.groupby('producto_id', sort=False)['signed'].sum())
+
+        salidas = df[tipo == 'salida']
+        parciales_ventas.append(salidas.groupby('producto_id', sort=False)['cantidad'].sum())
+
+        # Formato explícito + cache: las fechas se repiten mucho y evita inferir el formato
+        fecha = pd.to_datetime(salidas['fecha'], format=FORMATO_FECHA, cache=True, errors='coerce')
+        con_fecha = fecha.notna().values
+        mes_idx = (fecha[con_fecha].dt.month - 1).astype('int8').rename('mes_idx')
+        parciales_mes.append(
+            salidas[con_fecha].groupby(['producto_id', mes_idx], sort=False)['cantidad'].sum()
+        )
+
+    stock_actual = pd.concat(parciales_stock).groupby(level=0, sort=False).sum()
+    ventas_totales = pd.concat(parciales_ventas).groupby(level=0, sort=False).sum()
+
+    # Una fila de 12 posiciones por producto (enero a diciembre), alineada con MESES
+    totales_mes = pd.concat(parciales_mes)
+    productos_mes, fila = np.unique(totales_mes.index.get_level_values(0), return_inverse=True)
+    ventas_por_mes = np.zeros((len(productos_mes), 12), dtype='int64')
+    np.add.at(ventas_por_mes, (fila, totales_mes.index.get_level_values(1)), totales_mes.values)
+
+    # Conversión a int de Python en una sola pasada por serie (tolist), no por documento
+    ventas_docs = [
+        {
+            "producto_id": producto_id,
+            "nombre_producto": f"Producto {producto_id}",  # Asignamos un nombre base
+            "total_ventas": total
+        }
+        for producto_id, total in zip(ventas_totales.index.astype('int64').tolist(),
+                                      ventas_totales.to_numpy(dtype='int64').tolist())
+    ]
+
+    stock_docs = [
+        {
+            "producto_id": producto_id,
+            "nombre_producto": f"Producto {producto_id}",
+            "stock_actual": stock,
+            "estado": "CRÍTICO" if stock < 10 else "BAJO" if stock < 50 else "NORMAL"
+        }
+        for producto_id, stock in zip(stock_actual.index.astype('int64').tolist(),
+                                      stock_actual.to_numpy(dtype='int64').tolist())
+    ]
+
+    estacionalidad_docs = [
+        {
+            "producto_id": producto_id,
+            "nombre_producto": f"Producto {producto_id}",
+            "ventas_por_mes": ventas_mes  # 12 enteros, enero a diciembre
+        }
+        for producto_id, ventas_mes in zip(productos_mes.astype('int64').tolist(), ventas_por_mes.tolist())
+    ]
+    return ventas_docs, stock_docs, estacionalidad_docs
+
 
 # ========= FUNCIONES DE GRAFICACIÓN ==========
-def graficar_top_ventas(limit=10):
-    ventas = list(db.ventas_aggregadas.find().sort("total_ventas", -1).limit(limit))
-    productos = [venta.get("nombre_producto", f"Producto {venta['producto_id']}") for venta in ventas]
-    cantidades = [venta["total_ventas"] for venta in ventas]
-
-    plt.figure(figsize=(12,6))
-    sns.barplot(x=cantidades, y=productos, palette="viridis")
-    plt.title("Top Productos Más Vendidos")
-    plt.xlabel("Total de Ventas")
-    plt.ylabel("Producto")
-    plt.tight_layout()
-    plt.savefig("top_ventas.png")
-    plt.show()
-
-def graficar_alertas_stock():
-    alertas = list(db.alertas_stock.find())
-    conteo = {"CRÍTICO": 0, "BAJO": 0, "NORMAL": 0}
-    for alerta in alertas:
-        estado = alerta.get("estado", "NORMAL")
-        conteo[estado] += 1
+# Figuras reutilizadas entre llamadas: se limpian los ejes en vez de crear una figura nueva.
+# Se crean al primer uso dentro de cada proceso del pool (el servidor nunca dibuja);
+# cada worker ejecuta una tarea a la vez, así que no hace falta un lock.
+_TAMANOS_FIGURA = {"barras": (12,6), "torta": (8,8), "linea": (12,6)}
+_figuras = {}
+
+
+def _figura(nombre):
+    if nombre not in _figuras:
+        _figuras[nombre] = plt.subplots(figsize=_TAMANOS_FIGURA[nombre])
+    fig, ax = _figuras[nombre]
+    ax.clear()
+    return fig, ax
+
+
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def graficar_top_ventas(productos, cantidades):
+    fig, ax = _figura("barras")
+    sns.barplot(x=cantidades, y=productos, palette="viridis", ax=ax)
+    ax.set_title("Top Productos Más Vendidos")
+    ax.set_xlabel("Total de Ventas")
+    ax.set_ylabel("Producto")
+    fig.tight_layout()
+    return _png(fig)
 
+def graficar_alertas_stock(conteo):
     labels = list(conteo.keys())
     valores = list(conteo.values())
 
-    plt.figure(figsize=(8,8))
-    plt.pie(valores, labels=labels, autopct='%1.1f%%', startangle=140, colors=["#ff4d4d", "#ffcc00", "#66b266"])
-    plt.title("Distribución de Estados de Stock")
-    plt.axis("equal")
-    plt.savefig("alertas_stock.png")
-    plt.show()
-def graficar_estacionalidad():
-    estacionalidad = list(db.estacionalidad.find().limit(3))
-    meses = ["enero", "febrero", "marzo", "abril", "mayo", "junio",
-             "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
-
-    plt.figure(figsize=(12,6))
-
-    for dato in estacionalidad:
-        ventas = [dato["ventas_por_mes"].get(mes, 0) for mes in meses]
-        plt.plot(meses, ventas, marker='o', label=dato.get("nombre_producto", f"Producto {dato['producto_id']}"))
-
-    plt.title("Estacionalidad de Ventas (3 Productos)")
-    plt.xlabel("Mes")
-    plt.ylabel("Ventas")
-    plt.xticks(rotation=45)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("estacionalidad_ventas.png")
-    plt.show()
+    fig, ax = _figura("torta")
+    ax.pie(valores, labels=labels, autopct='%1.1f%%', startangle=140, colors=["#ff4d4d", "#ffcc00", "#66b266"])
+    ax.set_title("Distribución de Estados de Stock")
+    ax.axis("equal")
+    return _png(fig)
+def graficar_estacionalidad(estacionalidad):
+    fig, ax = _figura("linea")
+
+    for dataset in estacionalidad:
+        ax.plot(MESES, dataset["data"], marker='o', label=dataset["label"])
+
+    ax.set_title("Estacionalidad de Ventas (3 Productos)")
+    ax.set_xlabel("Mes")
+    ax.set_ylabel("Ventas")
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.legend()
+    fig.tight_layout()
+    return _png(fig)
 
 
 # ========= EJECUCIÓN DIRECTA ==========